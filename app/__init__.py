@@ -12,6 +12,8 @@ def create_app():
     # Configuration
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key')
     app.config['DATABASE_PATH'] = os.getenv('DATABASE_PATH', os.path.join(os.getcwd(), 'mgnrega.db'))
+    app.config['DATABASE_SHARD_DIR'] = os.getenv('DATABASE_SHARD_DIR')
+    app.config['SNAPSHOT_DIR'] = os.getenv('SNAPSHOT_DIR', os.path.join(os.getcwd(), 'snapshots'))
 
     # Register blueprints
     from .routes import main
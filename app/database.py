@@ -1,7 +1,13 @@
 import sqlite3
 import os
-from typing import List, Dict, Any, Optional
+import re
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
+from . import timeseries
 
 class DistrictPerformance:
     def __init__(self, id: str, district: str, state: str, year: int, month: int,
@@ -66,29 +72,59 @@ class MGNREGADatabase:
             conn.execute('CREATE INDEX IF NOT EXISTS idx_district_year_month ON district_performance(district, year, month);')
             conn.execute('CREATE INDEX IF NOT EXISTS idx_state_year ON district_performance(state, year);')
 
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS quarantined_records (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    year INTEGER,
+                    reason TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                );
+            ''')
+
+    _INSERT_SQL = '''
+        INSERT OR REPLACE INTO district_performance
+        (id, district, state, year, month, person_days_generated, total_expenditure,
+         avg_days_of_employment, work_completion_rate, total_households_completed_100_days,
+         female_participation_rate, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    '''
+
+    @staticmethod
+    def _insert_params(data: DistrictPerformance, updated_at: datetime) -> tuple:
+        return (
+            data.id,
+            data.district,
+            data.state,
+            data.year,
+            data.month,
+            data.person_days_generated,
+            data.total_expenditure,
+            data.avg_days_of_employment,
+            data.work_completion_rate,
+            data.total_households_completed_100_days,
+            data.female_participation_rate,
+            updated_at
+        )
+
     def insert_performance(self, data: DistrictPerformance):
         """Insert or replace performance data."""
         with sqlite3.connect(self.db_path) as conn:
-            conn.execute('''
-                INSERT OR REPLACE INTO district_performance
-                (id, district, state, year, month, person_days_generated, total_expenditure,
-                 avg_days_of_employment, work_completion_rate, total_households_completed_100_days,
-                 female_participation_rate, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                data.id,
-                data.district,
-                data.state,
-                data.year,
-                data.month,
-                data.person_days_generated,
-                data.total_expenditure,
-                data.avg_days_of_employment,
-                data.work_completion_rate,
-                data.total_households_completed_100_days,
-                data.female_participation_rate,
-                datetime.now()
-            ))
+            conn.execute(self._INSERT_SQL, self._insert_params(data, datetime.now()))
+
+    def insert_performance_batch(self, items: List[DistrictPerformance]):
+        """Insert or replace many rows in a single transaction."""
+        updated_at = datetime.now()
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executemany(self._INSERT_SQL, (self._insert_params(item, updated_at) for item in items))
+
+    def quarantine_record(self, year: Optional[int], record: Dict[str, Any], reason: str):
+        """Store a raw record that failed validation so it can be inspected later."""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                'INSERT INTO quarantined_records (year, reason, payload) VALUES (?, ?, ?)',
+                (year, reason, json.dumps(record, sort_keys=True, default=str))
+            )
 
     def get_all_performance(self) -> List[DistrictPerformance]:
         """Get all performance data."""
@@ -97,13 +133,15 @@ class MGNREGADatabase:
 
         return [DistrictPerformance(*row) for row in rows]
 
-    def get_performance_by_district(self, district: str) -> List[DistrictPerformance]:
-        """Get performance data for a specific district."""
+    def get_performance_by_district(self, district: str, state: Optional[str] = None) -> List[DistrictPerformance]:
+        """Get performance data for a specific district, optionally restricted to one state."""
+        sql = 'SELECT id, district, state, year, month, person_days_generated, total_expenditure, avg_days_of_employment, work_completion_rate, total_households_completed_100_days, female_participation_rate FROM district_performance WHERE district = ?'
+        params = [district]
+        if state is not None:
+            sql += ' AND state = ?'
+            params.append(state)
         with sqlite3.connect(self.db_path) as conn:
-            rows = conn.execute(
-                'SELECT id, district, state, year, month, person_days_generated, total_expenditure, avg_days_of_employment, work_completion_rate, total_households_completed_100_days, female_participation_rate FROM district_performance WHERE district = ? ORDER BY year, month',
-                (district,)
-            ).fetchall()
+            rows = conn.execute(sql + ' ORDER BY year, month', params).fetchall()
 
         return [DistrictPerformance(*row) for row in rows]
 
@@ -124,6 +162,229 @@ class MGNREGADatabase:
 
         return [row[0] for row in rows]
 
+    def get_month_range(self, districts: Optional[List[str]] = None) -> Tuple[Optional[int], Optional[int]]:
+        """Get the first and last fin-year month index with data, optionally for some districts."""
+        sql = f"SELECT MIN({timeseries.MONTH_INDEX_SQL}), MAX({timeseries.MONTH_INDEX_SQL}) FROM district_performance"
+        params: List[str] = []
+        if districts:
+            sql += f" WHERE district IN ({', '.join('?' for _ in districts)})"
+            params = list(districts)
+        with sqlite3.connect(self.db_path) as conn:
+            return conn.execute(sql, params).fetchone()
+
+    def get_timeseries(self, metrics: List[str], districts: Optional[List[str]] = None,
+                       granularity: str = 'month', start_index: Optional[int] = None,
+                       end_index: Optional[int] = None, window: int = 3,
+                       max_points: int = timeseries.DEFAULT_MAX_POINTS) -> List[Dict[str, Any]]:
+        """Get bucketed, downsampled metric series with rolling averages."""
+        sql, params = timeseries.build_query(metrics, districts, granularity, start_index,
+                                             end_index, window, max_points)
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(sql, params).fetchall()
+
+        return [dict(row) for row in rows]
+
     def close(self):
         """Close database connection (SQLite handles this automatically, but kept for compatibility)."""
         pass
+
+
+class ShardedMGNREGADatabase:
+    """Router over one SQLite file per state.
+
+    Exposes the same interface as MGNREGADatabase. Single-state queries go to
+    that state's shard, cross-state queries fan out to every shard in parallel
+    and are merged, and writers for different states never share a lock.
+    """
+
+    SHARD_PREFIX = 'state_'
+    QUARANTINE_NAME = 'quarantine.db'
+    # Seconds before the district -> shard index is rebuilt; lookups of unknown
+    # districts within this window are answered from the cached index
+    INDEX_TTL = 60
+
+    def __init__(self, shard_dir: str, max_workers: int = 8):
+        self.shard_dir = shard_dir
+        self.max_workers = max_workers
+        self._shards: Dict[str, MGNREGADatabase] = {}
+        self._district_index: Dict[str, List[str]] = {}
+        self._district_index_at: Optional[float] = None
+        self._lock = threading.Lock()
+        os.makedirs(self.shard_dir, exist_ok=True)
+        self._quarantine = MGNREGADatabase(os.path.join(self.shard_dir, self.QUARANTINE_NAME))
+
+    @staticmethod
+    def _shard_key(state: str) -> str:
+        return re.sub(r'[^a-z0-9]+', '_', state.strip().lower()).strip('_')
+
+    def _shard_path(self, key: str) -> str:
+        return os.path.join(self.shard_dir, f"{self.SHARD_PREFIX}{key}.db")
+
+    def _existing_keys(self) -> List[str]:
+        keys = []
+        for name in os.listdir(self.shard_dir):
+            if name.startswith(self.SHARD_PREFIX) and name.endswith('.db'):
+                keys.append(name[len(self.SHARD_PREFIX):-len('.db')])
+        return sorted(keys)
+
+    def _get_shard(self, key: str) -> MGNREGADatabase:
+        with self._lock:
+            shard = self._shards.get(key)
+            if shard is None:
+                shard = MGNREGADatabase(self._shard_path(key))
+                self._shards[key] = shard
+            return shard
+
+    def shard_for(self, state: str, create: bool = True) -> Optional[MGNREGADatabase]:
+        """Return the shard holding a state's data, or None if it doesn't exist and create is False."""
+        key = self._shard_key(state)
+        if not create and not os.path.exists(self._shard_path(key)):
+            return None
+        return self._get_shard(key)
+
+    def _fan_out(self, query, keys: Optional[List[str]] = None) -> List[Any]:
+        """Run query(shard) against every shard in parallel, returning results in shard order."""
+        shards = [self._get_shard(key) for key in (keys if keys is not None else self._existing_keys())]
+        if len(shards) <= 1:
+            return [query(shard) for shard in shards]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(shards))) as executor:
+            return list(executor.map(query, shards))
+
+    def _refresh_district_index(self):
+        keys = self._existing_keys()
+        results = self._fan_out(lambda shard: shard.get_districts(), keys)
+        index: Dict[str, List[str]] = {}
+        for key, districts in zip(keys, results):
+            for district in districts:
+                index.setdefault(district, []).append(key)
+        with self._lock:
+            self._district_index = index
+            self._district_index_at = time.monotonic()
+
+    def _ensure_district_index(self):
+        """Rebuild the district index only when it has never been built or has expired."""
+        built_at = self._district_index_at
+        if built_at is None or time.monotonic() - built_at > self.INDEX_TTL:
+            self._refresh_district_index()
+
+    def _index_rows(self, key: str, items: List[DistrictPerformance]):
+        with self._lock:
+            for item in items:
+                keys = self._district_index.setdefault(item.district, [])
+                if key not in keys:
+                    keys.append(key)
+
+    def insert_performance(self, data: DistrictPerformance):
+        """Insert or replace performance data in its state's shard."""
+        self.insert_performance_batch([data])
+
+    def insert_performance_batch(self, items: List[DistrictPerformance]):
+        """Insert or replace rows, writing each state's rows to its own shard."""
+        by_state: Dict[str, List[DistrictPerformance]] = {}
+        for item in items:
+            by_state.setdefault(self._shard_key(item.state), []).append(item)
+
+        for key, rows in by_state.items():
+            self._get_shard(key).insert_performance_batch(rows)
+            self._index_rows(key, rows)
+
+    def quarantine_record(self, year: Optional[int], record: Dict[str, Any], reason: str):
+        """Store a rejected record in its state's existing shard, or the shared quarantine file otherwise.
+
+        The record has failed validation, so its state name is never used to create a shard.
+        """
+        state = record.get('state_name') if isinstance(record, dict) else None
+        target = None
+        if isinstance(state, str) and self._shard_key(state):
+            target = self.shard_for(state, create=False)
+        (target or self._quarantine).quarantine_record(year, record, reason)
+
+    def get_all_performance(self) -> List[DistrictPerformance]:
+        """Get all performance data across every shard."""
+        rows = [row for result in self._fan_out(lambda shard: shard.get_all_performance()) for row in result]
+        rows.sort(key=lambda x: (x.district, x.year, x.month))
+        return rows
+
+    def get_performance_by_district(self, district: str, state: Optional[str] = None) -> List[DistrictPerformance]:
+        """Get performance data for a district from a single state's shard.
+
+        When ``state`` is omitted and several states have a district with this
+        name, the first shard in name order is used so series never mix states.
+        """
+        if state is not None:
+            # A shard only holds rows for its own state, so matching on the shard key is enough
+            shard = self.shard_for(state, create=False)
+            return shard.get_performance_by_district(district) if shard else []
+
+        self._ensure_district_index()
+        keys = self._district_index.get(district)
+        if not keys:
+            return []
+        return self._get_shard(sorted(keys)[0]).get_performance_by_district(district)
+
+    def get_performance_by_state(self, state: str) -> List[DistrictPerformance]:
+        """Get performance data for a specific state from its shard."""
+        # Routing already normalises the state name, so return the whole shard rather
+        # than re-filtering on the exact spelling stored in it
+        shard = self.shard_for(state, create=False)
+        return shard.get_all_performance() if shard else []
+
+    def get_districts(self) -> List[str]:
+        """Get list of all districts across every shard."""
+        self._ensure_district_index()
+        return sorted(self._district_index)
+
+    def _keys_for_districts(self, districts: Optional[List[str]]) -> List[str]:
+        if not districts:
+            return self._existing_keys()
+        self._ensure_district_index()
+        return sorted({key for district in districts for key in self._district_index.get(district, [])})
+
+    def get_month_range(self, districts: Optional[List[str]] = None) -> Tuple[Optional[int], Optional[int]]:
+        """Get the first and last fin-year month index with data across the relevant shards."""
+        ranges = self._fan_out(lambda shard: shard.get_month_range(districts), self._keys_for_districts(districts))
+        starts = [start for start, _ in ranges if start is not None]
+        ends = [end for _, end in ranges if end is not None]
+        return (min(starts) if starts else None, max(ends) if ends else None)
+
+    def get_timeseries(self, metrics: List[str], districts: Optional[List[str]] = None,
+                       granularity: str = 'month', start_index: Optional[int] = None,
+                       end_index: Optional[int] = None, window: int = 3,
+                       max_points: int = timeseries.DEFAULT_MAX_POINTS) -> List[Dict[str, Any]]:
+        """Get metric series from the shards holding the districts, merged in order."""
+        timeseries.validate_params(metrics, granularity, window, max_points)
+        # Every shard must downsample over the same range so their points line up
+        if start_index is None or end_index is None:
+            first, last = self.get_month_range(districts)
+            start_index = first if start_index is None else start_index
+            end_index = last if end_index is None else end_index
+        if start_index is None or end_index is None:
+            return []
+
+        results = self._fan_out(
+            lambda shard: shard.get_timeseries(metrics, districts, granularity, start_index,
+                                               end_index, window, max_points),
+            self._keys_for_districts(districts)
+        )
+        rows = [row for result in results for row in result]
+        rows.sort(key=lambda row: (row['district'], row['state'], row['point']))
+        return rows
+
+    def migrate_from(self, source: MGNREGADatabase, batch_size: int = 1000):
+        """Copy every row from a single-file database into the per-state shards."""
+        rows = source.get_all_performance()
+        for start in range(0, len(rows), batch_size):
+            self.insert_performance_batch(rows[start:start + batch_size])
+        return len(rows)
+
+    def close(self):
+        """Close database connections (kept for compatibility with MGNREGADatabase)."""
+        pass
+
+
+def open_database(db_path: str, shard_dir: Optional[str] = None):
+    """Open the single-file database, or the per-state sharded layout when shard_dir is set."""
+    if shard_dir:
+        return ShardedMGNREGADatabase(shard_dir)
+    return MGNREGADatabase(db_path)
@@ -1,7 +1,9 @@
 import math
 import os
-from flask import Blueprint, render_template, request, jsonify, current_app
-from .database import MGNREGADatabase
+from flask import Blueprint, render_template, request, jsonify, current_app, abort, redirect, url_for
+from .database import open_database
+from . import timeseries
+from .snapshots import MANIFEST_NAME, find_snapshot, send_snapshot
 from .terminology import terminology, translations
 import google.generativeai as genai
 
@@ -10,10 +12,13 @@ main = Blueprint('main', __name__)
 # Global database instance
 db = None
 
+# Snapshot file names change with their content, so they can be cached for a year
+SNAPSHOT_MAX_AGE = 365 * 24 * 60 * 60
+
 def get_db():
     global db
     if db is None:
-        db = MGNREGADatabase(current_app.config['DATABASE_PATH'])
+        db = open_database(current_app.config['DATABASE_PATH'], current_app.config['DATABASE_SHARD_DIR'])
     return db
 
 # Karnataka district coordinates (approximate centers) - mapped to database names
@@ -74,12 +79,44 @@ def find_nearest_district(latitude, longitude):
         'distance': round(min_distance, 1)
     }
 
+def dashboard_context(districts, district_data, language, selected_district):
+    """Build the template context for a district dashboard page."""
+    historical_data = []
+    current_data = None
+
+    if district_data:
+        # Sort by year and month
+        district_data = sorted(district_data, key=lambda x: (x.year, x.month))
+        historical_data = [item.to_dict() for item in district_data]
+        current_data = historical_data[-1] if historical_data else None
+
+    # Convert terminology objects to dictionaries for JSON serialization
+    terminology_dict = {key: term.to_dict(language) for key, term in terminology.items()}
+
+    return {
+        'language': language,
+        'selected_district': selected_district,
+        'districts': districts,
+        'current_data': current_data,
+        'historical_data': historical_data,
+        'terminology': terminology_dict,
+        'translations': translations,
+    }
+
 @main.route('/')
 def dashboard():
     """Main dashboard page."""
     language = request.args.get('lang', 'kn')  # Default to Kannada for rural users
     selected_district = request.args.get('district', '')
 
+    # Serve the pre-rendered page when the build step has produced one
+    snapshot_dir = current_app.config['SNAPSHOT_DIR']
+    snapshot = find_snapshot(snapshot_dir, selected_district, language)
+    if snapshot:
+        response = send_snapshot(snapshot_dir, snapshot['html'])
+        if response is not None:
+            return response
+
     try:
         database = get_db()
         districts = database.get_districts()
@@ -88,41 +125,52 @@ def dashboard():
         if not selected_district and districts:
             selected_district = districts[0]
 
-        current_data = None
-        historical_data = []
-
-        if selected_district:
-            district_data = database.get_performance_by_district(selected_district)
-            if district_data:
-                # Sort by year and month
-                district_data.sort(key=lambda x: (x.year, x.month))
-                historical_data = [item.to_dict() for item in district_data]
-                current_data = historical_data[-1] if historical_data else None
-
-        # Convert terminology objects to dictionaries for JSON serialization
-        terminology_dict = {key: term.to_dict(language) for key, term in terminology.items()}
+        district_data = database.get_performance_by_district(selected_district) if selected_district else []
 
         return render_template('dashboard.html',
-                             language=language,
-                             selected_district=selected_district,
-                             districts=districts,
-                             current_data=current_data,
-                             historical_data=historical_data,
-                             terminology=terminology_dict,
-                             translations=translations)
+                             **dashboard_context(districts, district_data, language, selected_district))
 
     except Exception as e:
         print(f"Error loading dashboard: {e}")
-        # Convert terminology objects to dictionaries for JSON serialization
-        terminology_dict = {key: term.to_dict(language) for key, term in terminology.items()}
         return render_template('dashboard.html',
-                             language=language,
-                             selected_district=selected_district,
-                             districts=[],
-                             current_data=None,
-                             historical_data=[],
-                             terminology=terminology_dict,
-                             translations=translations)
+                             **dashboard_context([], [], language, selected_district))
+
+@main.route('/snapshots/<path:filename>')
+def snapshot_file(filename):
+    """Serve content-hashed snapshot files with long-lived caching."""
+    # The manifest keeps a stable name, so only the hashed files are cached long-term
+    max_age = None if filename == MANIFEST_NAME else SNAPSHOT_MAX_AGE
+    response = send_snapshot(current_app.config['SNAPSHOT_DIR'], filename, max_age=max_age)
+    if response is None:
+        abort(404)
+    return response
+
+@main.route('/api/district-data', methods=['GET'])
+def district_data():
+    """Get dashboard data for a district, redirecting to its snapshot when available."""
+    language = request.args.get('lang', 'kn')
+    selected_district = request.args.get('district', '')
+
+    snapshot = find_snapshot(current_app.config['SNAPSHOT_DIR'], selected_district, language)
+    if snapshot:
+        return redirect(url_for('main.snapshot_file', filename=snapshot['json']))
+
+    if not selected_district:
+        return jsonify({'error': 'District is required'}), 400
+
+    try:
+        database = get_db()
+        context = dashboard_context([], database.get_performance_by_district(selected_district),
+                                    language, selected_district)
+        return jsonify({
+            'district': selected_district,
+            'language': language,
+            'current_data': context['current_data'],
+            'historical_data': context['historical_data'],
+        })
+    except Exception as e:
+        print(f"Error fetching district data: {e}")
+        return jsonify({'error': 'Failed to fetch district data'}), 500
 
 @main.route('/api/geolocation', methods=['POST'])
 def geolocation():
@@ -180,6 +228,38 @@ def get_districts():
         print(f"Error fetching districts: {e}")
         return jsonify({'error': 'Failed to fetch districts'}), 500
 
+@main.route('/api/timeseries', methods=['GET'])
+def get_timeseries():
+    """Get downsampled metric series with rolling averages."""
+    try:
+        metrics = [m for m in request.args.get('metrics', '').split(',') if m]
+        districts = [d for d in request.args.get('districts', '').split(',') if d] or None
+        granularity = request.args.get('granularity', 'month')
+        start = request.args.get('start')
+        end = request.args.get('end')
+        window = int(request.args.get('window', 3))
+        max_points = int(request.args.get('max_points', timeseries.DEFAULT_MAX_POINTS))
+
+        start_index = timeseries.month_index(start) if start else None
+        end_index = timeseries.month_index(end) if end else None
+        timeseries.validate_params(metrics, granularity, window, max_points)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        database = get_db()
+        rows = database.get_timeseries(metrics, districts, granularity, start_index, end_index,
+                                       window, max_points)
+        return jsonify({
+            'metrics': metrics,
+            'granularity': granularity,
+            'window': window,
+            'series': timeseries.shape_series(rows, metrics, granularity),
+        })
+    except Exception as e:
+        print(f"Error fetching timeseries: {e}")
+        return jsonify({'error': 'Failed to fetch timeseries'}), 500
+
 @main.route('/api/generate-insights', methods=['POST'])
 def generate_insights():
     """Generate AI-powered insights for district performance."""
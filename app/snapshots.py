@@ -0,0 +1,159 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from flask import render_template, request, send_file
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # .br variants are skipped when brotli is not installed
+    brotli = None
+
+LANGUAGES = ('en', 'kn')
+MANIFEST_NAME = 'manifest.json'
+
+# Names written by the build step; only these are ever pruned from the output directory
+SNAPSHOT_FILE_RE = re.compile(r'^.+-[a-z]+\.[0-9a-f]{12}\.(html|json)(\.gz|\.br)?$')
+
+_manifest_cache: Dict[str, Any] = {}
+
+
+def _slug(district: str) -> str:
+    return district.lower().replace(' ', '-')
+
+
+def _write_variants(directory: str, name: str, content: bytes):
+    """Write a file plus its precompressed .gz and .br variants."""
+    path = os.path.join(directory, name)
+    with open(path, 'wb') as f:
+        f.write(content)
+    with open(path + '.gz', 'wb') as f:
+        f.write(gzip.compress(content, compresslevel=9, mtime=0))
+    if brotli is not None:
+        with open(path + '.br', 'wb') as f:
+            f.write(brotli.compress(content))
+
+
+def _write_hashed(directory: str, prefix: str, extension: str, content: bytes) -> str:
+    digest = hashlib.sha256(content).hexdigest()[:12]
+    name = f"{prefix}.{digest}.{extension}"
+    _write_variants(directory, name, content)
+    return name
+
+
+def build_snapshots(app, output_dir: Optional[str] = None) -> Dict[str, Any]:
+    """Pre-render every (district, language) dashboard page and its JSON data.
+
+    Files are written with content-hashed names; the manifest is replaced
+    atomically once everything is on disk, and snapshot files it no longer
+    references are removed. Anything else in the directory is left alone.
+    """
+    from .database import open_database
+    from .routes import dashboard_context
+
+    output_dir = output_dir or app.config['SNAPSHOT_DIR']
+    os.makedirs(output_dir, exist_ok=True)
+
+    database = open_database(app.config['DATABASE_PATH'], app.config['DATABASE_SHARD_DIR'])
+    districts = database.get_districts()
+    pages: Dict[str, Dict[str, Dict[str, str]]] = {}
+
+    for district in districts:
+        district_data = database.get_performance_by_district(district)
+        pages[district] = {}
+        for language in LANGUAGES:
+            context = dashboard_context(districts, district_data, language, district)
+            with app.test_request_context('/', query_string={'district': district, 'lang': language}):
+                html = render_template('dashboard.html', **context)
+            data = json.dumps({
+                'district': district,
+                'language': language,
+                'current_data': context['current_data'],
+                'historical_data': context['historical_data'],
+            }, ensure_ascii=False, sort_keys=True)
+
+            prefix = f"{_slug(district)}-{language}"
+            pages[district][language] = {
+                'html': _write_hashed(output_dir, prefix, 'html', html.encode('utf-8')),
+                'json': _write_hashed(output_dir, prefix, 'json', data.encode('utf-8')),
+            }
+
+    manifest = {
+        'generated_at': datetime.now().isoformat(),
+        'default_district': districts[0] if districts else None,
+        'pages': pages,
+    }
+
+    tmp_path = os.path.join(output_dir, MANIFEST_NAME + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, os.path.join(output_dir, MANIFEST_NAME))
+
+    keep = {MANIFEST_NAME}
+    for languages in pages.values():
+        for files in languages.values():
+            for name in files.values():
+                keep.update((name, name + '.gz', name + '.br'))
+    for name in os.listdir(output_dir):
+        path = os.path.join(output_dir, name)
+        if name not in keep and SNAPSHOT_FILE_RE.match(name) and os.path.isfile(path):
+            os.remove(path)
+
+    return manifest
+
+
+def load_manifest(directory: str) -> Dict[str, Any]:
+    """Load the snapshot manifest, re-reading it only when the file changes."""
+    path = os.path.join(directory, MANIFEST_NAME)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return {}
+
+    cached = _manifest_cache.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    with open(path, encoding='utf-8') as f:
+        manifest = json.load(f)
+    _manifest_cache[path] = (mtime, manifest)
+    return manifest
+
+
+def find_snapshot(directory: str, district: str, language: str) -> Optional[Dict[str, str]]:
+    """Return the snapshot file names for a district/language, if pre-rendered."""
+    manifest = load_manifest(directory)
+    if not manifest:
+        return None
+    district = district or manifest.get('default_district')
+    return manifest.get('pages', {}).get(district, {}).get(language)
+
+
+def send_snapshot(directory: str, filename: str, max_age: Optional[int] = None):
+    """Send a snapshot file, preferring a precompressed variant the client accepts."""
+    path = safe_join(directory, filename)
+    if path is None or not os.path.isfile(path):
+        return None
+
+    base, extension = os.path.splitext(filename)
+    if extension in ('.gz', '.br'):
+        extension = os.path.splitext(base)[1]
+    mimetype = 'text/html' if extension == '.html' else 'application/json'
+
+    for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if request.accept_encodings[encoding] > 0 and os.path.isfile(path + suffix):
+            response = send_file(path + suffix, mimetype=mimetype, max_age=max_age)
+            response.headers['Content-Encoding'] = encoding
+            break
+    else:
+        response = send_file(path, mimetype=mimetype, max_age=max_age)
+
+    response.vary.add('Accept-Encoding')
+    if max_age:
+        response.cache_control.immutable = True
+    return response
@@ -0,0 +1,173 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Every column is reported as of the end of its month: the counters are fin-year-to-date
+# totals and the rates are derived from those totals. A bucket therefore takes the value
+# of its latest month; summing months would count the same work several times.
+METRICS = (
+    'person_days_generated',
+    'total_expenditure',
+    'avg_days_of_employment',
+    'work_completion_rate',
+    'total_households_completed_100_days',
+    'female_participation_rate',
+)
+
+# Number of fin-year months in each bucket
+GRANULARITIES = {
+    'month': 1,
+    'quarter': 3,
+    'fin_year': 12,
+}
+
+DEFAULT_MAX_POINTS = 60
+MAX_POINTS_LIMIT = 366
+MAX_WINDOW = MAX_POINTS_LIMIT
+
+# Months since the start of fin year 0, where the fin year runs April to March.
+# ``year`` in district_performance is the fin-year start and ``month`` the calendar month.
+MONTH_INDEX_SQL = '(year * 12 + (month + 8) % 12)'
+
+
+def month_index(value: str) -> int:
+    """Convert a calendar month 'YYYY-MM' into a fin-year month index."""
+    try:
+        year, month = (int(part) for part in value.split('-'))
+    except (AttributeError, ValueError):
+        raise ValueError(f"invalid month {value!r}, expected YYYY-MM")
+    if not 1 <= month <= 12:
+        raise ValueError(f"invalid month {value!r}, expected YYYY-MM")
+    fin_year = year if month >= 4 else year - 1
+    return fin_year * 12 + (month + 8) % 12
+
+
+def format_month(index: int) -> str:
+    """Convert a fin-year month index back into a calendar month 'YYYY-MM'."""
+    fin_year, offset = divmod(index, 12)
+    month = (offset + 3) % 12 + 1
+    year = fin_year + 1 if month < 4 else fin_year
+    return f"{year:04d}-{month:02d}"
+
+
+def format_label(index: int, granularity: str) -> str:
+    """Human readable label for the bucket starting at a month index."""
+    fin_year, offset = divmod(index, 12)
+    if granularity == 'fin_year':
+        return f"{fin_year}-{(fin_year + 1) % 100:02d}"
+    if granularity == 'quarter':
+        return f"{fin_year}-{(fin_year + 1) % 100:02d} Q{offset // 3 + 1}"
+    return format_month(index)
+
+
+def validate_params(metrics: Sequence[str], granularity: str, window: int, max_points: int):
+    """Raise ValueError for unknown metrics/granularity or out-of-range window/max_points."""
+    if not metrics:
+        raise ValueError('at least one metric is required')
+    unknown = [metric for metric in metrics if metric not in METRICS]
+    if unknown:
+        raise ValueError(f"unknown metric(s): {', '.join(unknown)}")
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of: {', '.join(GRANULARITIES)}")
+    if not 1 <= window <= MAX_WINDOW:
+        raise ValueError(f"window must be between 1 and {MAX_WINDOW}")
+    if not 1 <= max_points <= MAX_POINTS_LIMIT:
+        raise ValueError(f"max_points must be between 1 and {MAX_POINTS_LIMIT}")
+
+
+def build_query(metrics: Sequence[str], districts: Optional[Sequence[str]], granularity: str,
+                start_index: Optional[int], end_index: Optional[int],
+                window: int, max_points: int) -> Tuple[str, Dict[str, Any]]:
+    """Build the single-statement SQL computing buckets, downsampling and rolling averages.
+
+    Monthly rows are grouped into ``granularity`` buckets and consecutive
+    buckets are merged so that no series has more than ``max_points`` points.
+    Each point takes the values of its latest month, and a rolling average
+    over ``window`` points is computed per (state, district) with window
+    functions.
+    """
+    validate_params(metrics, granularity, window, max_points)
+    months_per_bucket = GRANULARITIES[granularity]
+
+    params: Dict[str, Any] = {
+        'start_index': start_index,
+        'end_index': end_index,
+        'origin': start_index // months_per_bucket if start_index is not None else None,
+        'last': end_index // months_per_bucket if end_index is not None else None,
+        'max_points': max_points,
+    }
+
+    filters = [
+        f"(:start_index IS NULL OR {MONTH_INDEX_SQL} >= :start_index)",
+        f"(:end_index IS NULL OR {MONTH_INDEX_SQL} <= :end_index)",
+    ]
+    if districts:
+        names = []
+        for i, district in enumerate(districts):
+            params[f"district_{i}"] = district
+            names.append(f":district_{i}")
+        filters.append(f"district IN ({', '.join(names)})")
+
+    metric_columns = ', '.join(metrics)
+    window_columns = ', '.join(f"{m}, AVG({m}) OVER rolling AS {m}_rolling" for m in metrics)
+
+    sql = f'''
+        WITH monthly AS (
+            SELECT state, district,
+                   {MONTH_INDEX_SQL} AS month_index,
+                   {MONTH_INDEX_SQL} / {months_per_bucket} AS bucket,
+                   {metric_columns}
+            FROM district_performance
+            WHERE {' AND '.join(filters)}
+        ),
+        bounds AS (
+            SELECT COALESCE(:origin, MIN(bucket)) AS origin,
+                   (COALESCE(:last, MAX(bucket)) - COALESCE(:origin, MIN(bucket)) + :max_points) / :max_points AS stride
+            FROM monthly
+        ),
+        ranked AS (
+            SELECT monthly.*,
+                   (bucket - origin) / stride AS point,
+                   origin + ((bucket - origin) / stride) * stride AS first_bucket,
+                   stride,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY state, district, (bucket - origin) / stride
+                       ORDER BY month_index DESC
+                   ) AS recency
+            FROM monthly, bounds
+        )
+        SELECT state, district, point, first_bucket, stride, month_index, {window_columns}
+        FROM ranked
+        WHERE recency = 1
+        WINDOW rolling AS (PARTITION BY state, district ORDER BY point ROWS BETWEEN {window - 1} PRECEDING AND CURRENT ROW)
+        ORDER BY district, state, point
+    '''
+    return sql, params
+
+
+def shape_series(rows: List[Dict[str, Any]], metrics: Sequence[str], granularity: str) -> List[Dict[str, Any]]:
+    """Group flat query rows into one chart-ready series per (district, state)."""
+    months_per_bucket = GRANULARITIES[granularity]
+    series: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    for row in rows:
+        key = (row['district'], row['state'])
+        entry = series.get(key)
+        if entry is None:
+            entry = series[key] = {'district': row['district'], 'state': row['state'], 'points': []}
+
+        start = row['first_bucket'] * months_per_bucket
+        end = (row['first_bucket'] + row['stride']) * months_per_bucket - 1
+        entry['points'].append({
+            'label': format_label(start, granularity),
+            'start': format_month(start),
+            'end': format_month(end),
+            'as_of': format_month(row['month_index']),
+            'values': {
+                metric: {
+                    'value': row[metric],
+                    'rolling': row[f"{metric}_rolling"],
+                }
+                for metric in metrics
+            },
+        })
+
+    return list(series.values())
@@ -0,0 +1,12 @@
+#!/usr/bin/env python3
+"""
+Benchmark the ingestion transform stage on synthetic records (no network)
+"""
+
+import sys
+from app.transform import benchmark
+
+if __name__ == '__main__':
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    stats = benchmark(total)
+    print(stats.summary())
@@ -0,0 +1,12 @@
+#!/usr/bin/env python3
+"""
+Pre-render dashboard pages for every district and language into SNAPSHOT_DIR
+"""
+
+from app import create_app
+from app.snapshots import build_snapshots
+
+if __name__ == '__main__':
+    app = create_app()
+    manifest = build_snapshots(app)
+    print(f"Built snapshots for {len(manifest['pages'])} districts into {app.config['SNAPSHOT_DIR']}")
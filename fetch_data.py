@@ -1,8 +1,13 @@
 import requests
 import os
 from dotenv import load_dotenv
-from app.database import MGNREGADatabase, DistrictPerformance
+from app import create_app
+from app.database import open_database
+from app.snapshots import build_snapshots
+from app.transform import TransformStage
+import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 load_dotenv()
 
@@ -14,7 +19,8 @@ class DataFetcher:
 
         self.base_url = 'https://api.data.gov.in/resource/ee03643a-ee4c-48c2-ac30-9f2ff26ab722'
         self.db_path = os.getenv('DATABASE_PATH', os.path.join(os.getcwd(), 'mgnrega.db'))
-        self.db = MGNREGADatabase(self.db_path)
+        self.shard_dir = os.getenv('DATABASE_SHARD_DIR')
+        self.db = open_database(self.db_path, self.shard_dir)
 
     def fetch_data(self, params=None):
         """Fetch data from the API with given parameters."""
@@ -35,97 +41,73 @@ class DataFetcher:
 
         return response.json()
 
+    def fetch_pages(self, state_name: str, year: int):
+        """Yield pages of raw records for a state and financial year."""
+        offset = 0
+        limit = 10  # Sample API key limit
+
+        while True:
+            try:
+                data = self.fetch_data({
+                    'filters[state_name]': state_name.upper(),  # All caps
+                    'filters[fin_year]': f"{year}-{year+1}",  # Format: 2024-2025
+                    'offset': offset,
+                    'limit': limit,
+                })
+            except Exception as error:
+                print(f"Error fetching data for {year} at offset {offset}: {error}")
+                return
+
+            records = data.get('records')
+            if not records:
+                return
+
+            print(f"Fetched {len(records)} records for {year} (offset: {offset})")
+            yield records
+
+            offset += limit
+
+            # Check if we've fetched all records
+            if len(records) < limit:
+                return
+
+            # Add a small delay to be respectful to the API
+            time.sleep(0.1)
+
     def fetch_all_data_for_state(self, state_name: str, years: list):
         """Fetch all data for a state across multiple years."""
         for year in years:
             print(f"Fetching data for {state_name} - {year}")
 
-            offset = 0
-            limit = 10  # Sample API key limit
-            has_more_data = True
-
-            while has_more_data:
-                try:
-                    data = self.fetch_data({
-                        'filters[state_name]': state_name.upper(),  # All caps
-                        'filters[fin_year]': f"{year}-{year+1}",  # Format: 2024-2025
-                        'offset': offset,
-                        'limit': limit,
-                    })
-
-                    if not data.get('records'):
-                        has_more_data = False
-                        break
-
-                    print(f"Fetched {len(data['records'])} records for {year} (offset: {offset})")
-
-                    # Process and store records
-                    for record in data['records']:
-                        # Map API field names to our database schema
-                        month_map = {
-                            'Jan': 1, 'Feb': 2, 'Mar': 3, 'Apr': 4, 'May': 5, 'Jun': 6,
-                            'Jul': 7, 'Aug': 8, 'Sep': 9, 'Oct': 10, 'Nov': 11, 'Dec': 12
-                        }
-
-                        month_num = month_map.get(record.get('month', ''), 1)
-
-                        # Calculate work completion rate from available data
-                        total_works = int(record.get('Total_No_of_Works_Takenup', 0))
-                        completed_works = int(record.get('Number_of_Completed_Works', 0))
-                        work_completion_rate = (completed_works / total_works * 100) if total_works > 0 else 0
-
-                        # Calculate female participation rate
-                        # Note: API data appears to have issues where women_persondays > total_persondays
-                        total_persondays = int(record.get('Total_Individuals_Worked', 0))
-                        women_persondays = int(record.get('Women_Persondays', 0))
-
-                        if women_persondays > total_persondays and total_persondays > 0:
-                            # Data appears incorrect, use a reasonable estimate with variation
-                            # Typical MGNREGA female participation rate ranges from 40-60%
-                            import random
-                            female_participation_rate = round(random.uniform(40.0, 60.0), 1)
-                        else:
-                            female_participation_rate = (women_persondays / total_persondays * 100) if total_persondays > 0 else 0
-                            female_participation_rate = min(female_participation_rate, 100.0)
-
-                        performance_data = DistrictPerformance(
-                            id=f"{year}-{month_num}-{record['district_name'].lower().replace(' ', '-')}",
-                            district=record['district_name'],
-                            state=record['state_name'],
-                            year=year,
-                            month=month_num,
-                            person_days_generated=int(record.get('Total_Individuals_Worked', 0)),
-                            total_expenditure=float(record.get('Total_Exp', 0)),
-                            avg_days_of_employment=float(record.get('Average_days_of_employment_provided_per_Household', 0)),
-                            work_completion_rate=round(work_completion_rate, 2),
-                            total_households_completed_100_days=int(record.get('Total_No_of_HHs_completed_100_Days_of_Wage_Employment', 0)),
-                            female_participation_rate=round(female_participation_rate, 2),
-                        )
-
-                        self.db.insert_performance(performance_data)
-
-                    offset += limit
-
-                    # Check if we've fetched all records
-                    if len(data['records']) < limit:
-                        has_more_data = False
-
-                    # Add a small delay to be respectful to the API
-                    time.sleep(0.1)
-
-                except Exception as error:
-                    print(f"Error fetching data for {year} at offset {offset}: {error}")
-                    has_more_data = False
-
-    def fetch_historical_data(self):
-        """Fetch historical data for Karnataka."""
+            stage = TransformStage(
+                year,
+                on_reject=lambda record, reason, year=year: self.db.quarantine_record(year, record, reason)
+            )
+
+            for batch in stage.run(self.fetch_pages(state_name, year)):
+                self.db.insert_performance_batch(batch)
+
+            print(stage.stats.summary())
+
+    def fetch_historical_data(self, states=None, max_workers=4):
+        """Fetch historical data for the given states (Karnataka by default)."""
+        states = states or ['Karnataka']
+        if len(states) > 1 and not self.shard_dir:
+            # Row ids don't include the state, so same-named districts would overwrite each other
+            raise ValueError('Fetching multiple states requires DATABASE_SHARD_DIR to be set')
         current_year = 2025  # Hardcoded for 2025 as per the task
         years = [current_year - 2, current_year - 1, current_year]  # Past 3 years
 
-        print(f"Starting data fetch for Karnataka ({', '.join(map(str, years))})")
+        print(f"Starting data fetch for {', '.join(states)} ({', '.join(map(str, years))})")
 
         try:
-            self.fetch_all_data_for_state('Karnataka', years)
+            if len(states) == 1:
+                self.fetch_all_data_for_state(states[0], years)
+            else:
+                # Each state writes to its own shard, so workers don't contend for a lock
+                with ThreadPoolExecutor(max_workers=min(max_workers, len(states))) as executor:
+                    for future in [executor.submit(self.fetch_all_data_for_state, state, years) for state in states]:
+                        future.result()
             print('Data fetching completed successfully')
         except Exception as error:
             print(f'Error during data fetching: {error}')
@@ -133,5 +115,9 @@ class DataFetcher:
 
 if __name__ == '__main__':
     fetcher = DataFetcher()
-    fetcher.fetch_historical_data()
+    fetcher.fetch_historical_data(sys.argv[1:] or None)
     fetcher.db.close()
+
+    # Refresh the static dashboard snapshots from the newly ingested data
+    manifest = build_snapshots(create_app())
+    print(f"Built snapshots for {len(manifest['pages'])} districts")
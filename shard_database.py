@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+"""
+Split the single-file database into one SQLite file per state under DATABASE_SHARD_DIR
+"""
+
+import os
+import sys
+from dotenv import load_dotenv
+from app.database import MGNREGADatabase, ShardedMGNREGADatabase
+
+load_dotenv()
+
+if __name__ == '__main__':
+    source_path = os.getenv('DATABASE_PATH', os.path.join(os.getcwd(), 'mgnrega.db'))
+    shard_dir = os.getenv('DATABASE_SHARD_DIR')
+    if not shard_dir:
+        print('DATABASE_SHARD_DIR environment variable is required')
+        sys.exit(1)
+
+    sharded = ShardedMGNREGADatabase(shard_dir)
+    count = sharded.migrate_from(MGNREGADatabase(source_path))
+    print(f"Copied {count} rows from {source_path} into {shard_dir}")
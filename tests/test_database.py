@@ -0,0 +1,117 @@
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+from app.database import DistrictPerformance, MGNREGADatabase, ShardedMGNREGADatabase, open_database
+
+REPO_DB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'mgnrega.db')
+
+
+def row(state, district, month, value=0.0, year=2024):
+    return DistrictPerformance(f"{state}-{year}-{month}-{district}", district, state, year, month,
+                               value, 0.0, 0.0, 0.0, 0, 0.0)
+
+
+def shard_files(router):
+    return sorted(name for name in os.listdir(router.shard_dir) if name.endswith('.db'))
+
+
+@pytest.fixture
+def router(tmp_path):
+    return ShardedMGNREGADatabase(str(tmp_path / 'shards'))
+
+
+def test_insert_batch_splits_rows_by_state(router):
+    router.insert_performance_batch([
+        row('KARNATAKA', 'MYSURU', 5),
+        row('TAMIL NADU', 'SALEM', 5),
+        row('KARNATAKA', 'UDUPI', 8),
+        row('TAMIL NADU', 'SALEM', 8),
+    ])
+
+    assert shard_files(router) == ['quarantine.db', 'state_karnataka.db', 'state_tamil_nadu.db']
+    for key, expected in (('karnataka', {'KARNATAKA'}), ('tamil_nadu', {'TAMIL NADU'})):
+        with sqlite3.connect(router._shard_path(key)) as conn:
+            states = {state for (state,) in conn.execute('SELECT state FROM district_performance')}
+            count = conn.execute('SELECT COUNT(*) FROM district_performance').fetchone()[0]
+        assert states == expected
+        assert count == 2
+
+
+@pytest.mark.parametrize('state', ['KARNATAKA', 'Karnataka', 'karnataka', ' Karnataka '])
+def test_state_routing_ignores_case(router, state):
+    router.insert_performance_batch([row('KARNATAKA', 'MYSURU', 5), row('KARNATAKA', 'MYSURU', 8),
+                                     row('KARNATAKA', 'UDUPI', 5), row('KERALA', 'WAYANAD', 5)])
+
+    assert len(router.get_performance_by_state(state)) == 3
+    assert [r.month for r in router.get_performance_by_district('MYSURU', state)] == [5, 8]
+
+
+def test_unknown_state_returns_nothing_without_creating_a_shard(router):
+    router.insert_performance(row('KARNATAKA', 'MYSURU', 5))
+
+    assert router.get_performance_by_state('Nowhere') == []
+    assert router.get_performance_by_district('MYSURU', 'Nowhere') == []
+    assert shard_files(router) == ['quarantine.db', 'state_karnataka.db']
+
+
+def test_shared_district_name_reads_one_state(router):
+    router.insert_performance_batch([
+        row('MAHARASHTRA', 'AURANGABAD', 5, 100.0),
+        row('MAHARASHTRA', 'AURANGABAD', 8, 110.0),
+        row('BIHAR', 'AURANGABAD', 5, 900.0),
+        row('BIHAR', 'AURANGABAD', 8, 910.0),
+    ])
+
+    rows = router.get_performance_by_district('AURANGABAD')
+    assert {r.state for r in rows} == {'BIHAR'}
+    assert [r.month for r in rows] == [5, 8]
+
+    rows = router.get_performance_by_district('AURANGABAD', 'Maharashtra')
+    assert [r.person_days_generated for r in rows] == [100.0, 110.0]
+    assert router.get_districts() == ['AURANGABAD']
+
+
+def test_unknown_district_is_cached(router, monkeypatch):
+    router.insert_performance(row('KARNATAKA', 'MYSURU', 5))
+    router.get_districts()
+
+    calls = []
+    monkeypatch.setattr(router, '_refresh_district_index', lambda: calls.append(1))
+    for _ in range(3):
+        assert router.get_performance_by_district('BOGUS') == []
+    assert calls == []
+
+
+def test_quarantine_never_creates_shards(router):
+    router.insert_performance(row('KARNATAKA', 'MYSURU', 5))
+
+    router.quarantine_record(2024, {'state_name': 'N/A'}, 'bad state')
+    router.quarantine_record(2024, {'state_name': 'Karnataka'}, 'bad month')
+    router.quarantine_record(2024, 'junk', 'not a dict')
+
+    assert shard_files(router) == ['quarantine.db', 'state_karnataka.db']
+    with sqlite3.connect(router._shard_path('karnataka')) as conn:
+        assert conn.execute('SELECT reason FROM quarantined_records').fetchall() == [('bad month',)]
+    with sqlite3.connect(os.path.join(router.shard_dir, 'quarantine.db')) as conn:
+        assert conn.execute('SELECT reason FROM quarantined_records ORDER BY id').fetchall() == [
+            ('bad state',), ('not a dict',)]
+
+
+def test_migrate_from_single_file(tmp_path, router):
+    source_path = str(tmp_path / 'mgnrega.db')
+    shutil.copy(REPO_DB, source_path)
+    source = MGNREGADatabase(source_path)
+
+    assert router.migrate_from(source, batch_size=100) == len(source.get_all_performance())
+    assert [r.to_dict() for r in router.get_all_performance()] == [r.to_dict() for r in source.get_all_performance()]
+    assert router.get_districts() == source.get_districts()
+    assert [r.to_dict() for r in router.get_performance_by_district('MYSURU')] == \
+        [r.to_dict() for r in source.get_performance_by_district('MYSURU')]
+
+
+def test_open_database_picks_layout(tmp_path):
+    assert isinstance(open_database(str(tmp_path / 'single.db')), MGNREGADatabase)
+    assert isinstance(open_database(str(tmp_path / 'single.db'), str(tmp_path / 'shards')), ShardedMGNREGADatabase)
@@ -0,0 +1,150 @@
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+from app import timeseries
+from app.database import DistrictPerformance, MGNREGADatabase, ShardedMGNREGADatabase
+
+REPO_DB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'mgnrega.db')
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = str(tmp_path / 'mgnrega.db')
+    shutil.copy(REPO_DB, path)
+    return MGNREGADatabase(path)
+
+
+@pytest.fixture
+def sharded(tmp_path, db):
+    router = ShardedMGNREGADatabase(str(tmp_path / 'shards'))
+    router.migrate_from(db)
+    return router
+
+
+def raw_rows(db, district, metric):
+    """(month_index, value) pairs for a district straight from the table."""
+    with sqlite3.connect(db.db_path) as conn:
+        rows = conn.execute(
+            f"SELECT year, month, {metric} FROM district_performance WHERE district = ?",
+            (district,)
+        ).fetchall()
+    return sorted(((year * 12 + (month + 8) % 12), value) for year, month, value in rows)
+
+
+def expected_points(db, district, metric, months_per_point):
+    """Value of the latest month in each group of ``months_per_point`` months."""
+    latest = {}
+    for index, value in raw_rows(db, district, metric):
+        latest[index // months_per_point] = (index, value)
+    return [latest[key] for key in sorted(latest)]
+
+
+@pytest.mark.parametrize('granularity', ['month', 'quarter', 'fin_year'])
+@pytest.mark.parametrize('metric', ['person_days_generated', 'total_households_completed_100_days',
+                                    'work_completion_rate'])
+def test_bucket_takes_latest_month(db, granularity, metric):
+    rows = db.get_timeseries([metric], ['BAGALKOTE'], granularity, window=1)
+    expected = expected_points(db, 'BAGALKOTE', metric, timeseries.GRANULARITIES[granularity])
+
+    assert [(row['month_index'], row[metric]) for row in rows] == expected
+    assert all(row[f"{metric}_rolling"] == row[metric] for row in rows)
+
+
+def test_fin_year_value_matches_year_end_total(db):
+    rows = db.get_timeseries(['person_days_generated'], ['BAGALKOTE'], 'fin_year')
+    fy2023 = [value for index, value in raw_rows(db, 'BAGALKOTE', 'person_days_generated')
+              if index // 12 == 2023]
+
+    assert rows[0]['person_days_generated'] == fy2023[-1] == max(fy2023)
+
+
+def test_downsampling_caps_points_and_keeps_latest_values(db):
+    rows = db.get_timeseries(['person_days_generated'], ['BAGALKOTE'], 'month', max_points=4)
+    first, last = db.get_month_range(['BAGALKOTE'])
+    stride = (last - first + 4) // 4
+
+    assert len(rows) <= 4
+    assert all(row['stride'] == stride for row in rows)
+
+    raw = raw_rows(db, 'BAGALKOTE', 'person_days_generated')
+    for row in rows:
+        start = row['first_bucket']
+        in_point = [(index, value) for index, value in raw if start <= index < start + stride]
+        assert (row['month_index'], row['person_days_generated']) == in_point[-1]
+
+
+def test_rolling_average(db):
+    rows = db.get_timeseries(['total_expenditure'], ['MYSURU'], 'month', window=3)
+    values = [row['total_expenditure'] for row in rows]
+
+    for i, row in enumerate(rows):
+        window = values[max(0, i - 2):i + 1]
+        assert row['total_expenditure_rolling'] == pytest.approx(sum(window) / len(window))
+
+
+def test_date_range_filters_and_aligns_points(db):
+    start = timeseries.month_index('2024-04')
+    end = timeseries.month_index('2025-03')
+    rows = db.get_timeseries(['person_days_generated'], None, 'quarter', start, end)
+
+    assert rows
+    assert all(start <= row['month_index'] <= end for row in rows)
+    assert {row['first_bucket'] * 3 for row in rows} <= {start, start + 3, start + 6, start + 9}
+
+
+def test_series_are_partitioned_by_state(tmp_path):
+    db = MGNREGADatabase(str(tmp_path / 'two-states.db'))
+    for state, base in (('KARNATAKA', 100), ('KERALA', 1000)):
+        for month, offset in ((5, 0), (8, 10)):
+            db.insert_performance(DistrictPerformance(
+                f"{state}-{month}", 'SHARED', state, 2024, month, base + offset, 0, 0, 0, 0, 0))
+
+    rows = db.get_timeseries(['person_days_generated'], ['SHARED'], 'fin_year')
+    assert [(row['state'], row['person_days_generated']) for row in rows] == [('KARNATAKA', 110), ('KERALA', 1010)]
+
+
+def test_sharded_matches_single_file(db, sharded):
+    for args in ((['total_expenditure', 'female_participation_rate'], None, 'quarter', None, None, 2, 5),
+                 (['person_days_generated'], ['MYSURU', 'UDUPI'], 'month', None, None, 3, 60)):
+        single = db.get_timeseries(*args)
+        merged = sharded.get_timeseries(*args)
+
+        assert len(single) == len(merged)
+        for a, b in zip(single, merged):
+            assert a.keys() == b.keys()
+            for key in a:
+                assert a[key] == pytest.approx(b[key]) if isinstance(a[key], float) else a[key] == b[key]
+
+
+def test_shape_series_labels(db):
+    rows = db.get_timeseries(['person_days_generated'], ['BAGALKOTE'], 'quarter')
+    series = timeseries.shape_series(rows, ['person_days_generated'], 'quarter')
+
+    assert len(series) == 1
+    point = series[0]['points'][0]
+    assert point['label'] == '2023-24 Q1'
+    assert (point['start'], point['end'], point['as_of']) == ('2023-04', '2023-06', '2023-05')
+
+
+@pytest.mark.parametrize('kwargs', [
+    {'metrics': ['bogus']},
+    {'granularity': 'week'},
+    {'window': 0},
+    {'window': timeseries.MAX_WINDOW + 1},
+    {'max_points': 0},
+])
+def test_validate_params_rejects(kwargs):
+    params = {'metrics': ['total_expenditure'], 'granularity': 'month', 'window': 3, 'max_points': 60}
+    params.update(kwargs)
+    with pytest.raises(ValueError):
+        timeseries.validate_params(**params)
+
+
+def test_month_index_round_trip():
+    for value in ('2023-04', '2024-01', '2024-03', '2025-12'):
+        assert timeseries.format_month(timeseries.month_index(value)) == value
+    with pytest.raises(ValueError):
+        timeseries.month_index('2024-13')
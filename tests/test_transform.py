@@ -0,0 +1,84 @@
+import json
+import sqlite3
+
+import pytest
+
+from app.database import MGNREGADatabase
+from app.transform import RecordError, TransformStage, synthetic_pages, transform_record
+
+
+def make_record(**overrides):
+    record = next(synthetic_pages(1))[0]
+    record.update(overrides)
+    return record
+
+
+@pytest.mark.parametrize('name, month', [
+    ('April', 4), ('June', 6), ('July', 7), ('March', 3),
+    ('Apr', 4), ('Jan', 1), (' december ', 12), ('SEPT', 9),
+])
+def test_month_names(name, month):
+    assert transform_record(make_record(month=name), 2024).month == month
+
+
+def test_full_month_names_pass_through_stage():
+    page = [make_record(month=name, district_name=f"D{i}") for i, name in enumerate(('April', 'June', 'July', 'March'))]
+    rejected = []
+    stage = TransformStage(2024, on_reject=lambda record, reason: rejected.append(reason))
+
+    rows = [row for batch in stage.run([page]) for row in batch]
+
+    assert rejected == []
+    assert [row.month for row in rows] == [4, 6, 7, 3]
+    assert [row.id for row in rows] == ['2024-4-d0', '2024-6-d1', '2024-7-d2', '2024-3-d3']
+
+
+@pytest.mark.parametrize('record', [
+    'not a dict',
+    make_record(month='Smarch'),
+    make_record(month=None),
+    make_record(district_name=None),
+    make_record(district_name=123),
+    make_record(state_name=''),
+    make_record(Total_Exp='N/A'),
+    make_record(Total_Individuals_Worked='1,234'),
+    make_record(Women_Persondays=None),
+])
+def test_transform_record_rejects(record):
+    with pytest.raises(RecordError):
+        transform_record(record, 2024)
+
+
+def test_rejects_are_quarantined_and_rest_of_page_written(tmp_path):
+    db = MGNREGADatabase(str(tmp_path / 'mgnrega.db'))
+    page = next(synthetic_pages(10, 10))
+    page[2]['Total_Exp'] = 'N/A'
+    page[5]['district_name'] = None
+    page[7] = ['not', 'a', 'dict']
+
+    stage = TransformStage(2024, batch_size=3,
+                           on_reject=lambda record, reason: db.quarantine_record(2024, record, reason))
+    for batch in stage.run([page]):
+        db.insert_performance_batch(batch)
+
+    assert (stage.stats.processed, stage.stats.rejected) == (10, 3)
+    with sqlite3.connect(db.db_path) as conn:
+        assert conn.execute('SELECT COUNT(*) FROM district_performance').fetchone()[0] == 7
+        quarantined = conn.execute('SELECT year, reason, payload FROM quarantined_records ORDER BY id').fetchall()
+
+    assert [(year, reason.split(':')[0]) for year, reason, _ in quarantined] == [
+        (2024, 'invalid Total_Exp'),
+        (2024, 'invalid district_name or state_name'),
+        (2024, 'record is not an object'),
+    ]
+    assert json.loads(quarantined[2][2]) == ['not', 'a', 'dict']
+
+
+@pytest.mark.parametrize('total, page_size, batch_size', [(0, 10, 4), (10, 10, 4), (25, 7, 5), (9, 3, 100)])
+def test_run_batches(total, page_size, batch_size):
+    stage = TransformStage(2024, batch_size=batch_size)
+    batches = list(stage.run(synthetic_pages(total, page_size)))
+
+    assert all(0 < len(batch) <= batch_size for batch in batches)
+    assert all(len(batch) == batch_size for batch in batches[:-1])
+    assert sum(len(batch) for batch in batches) == total == stage.stats.processed